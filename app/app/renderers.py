@@ -0,0 +1,30 @@
+"""
+Renderers for the APIs
+"""
+
+import orjson
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(renderers.BaseRenderer):
+    """Render JSON with orjson instead of the standard library."""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    # handles the types orjson doesn't know natively, e.g. Decimal
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        return orjson.dumps(
+            data,
+            default=self.encoder.default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
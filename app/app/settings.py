@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+from dataclasses import dataclass
 from pathlib import Path
 import environ
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +23,26 @@ env = environ.Env()
 # Take environment variables from .env file
 environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """Environment variables read once when settings are loaded."""
+
+    email_host: str
+    email_host_user: str
+    email_host_password: str
+    client_host: str
+    redis_url: str
+
+
+ENV_CONFIG = EnvConfig(
+    email_host=env('EMAIL_HOST'),
+    email_host_user=env('EMAIL_HOST_USER'),
+    email_host_password=env('EMAIL_HOST_PASSWORD'),
+    client_host=env('CLIENT_HOST'),
+    redis_url=env('REDIS_URL', default=''),
+)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
@@ -30,9 +52,11 @@ SECRET_KEY = (
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env.bool('DEBUG', default=False)
 
-ALLOWED_HOSTS = []
+# Comma separated, e.g. ALLOWED_HOSTS=api.example.com. Django allows
+# localhost with an empty list only while DEBUG is on.
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[])
 
 
 # Application definition
@@ -59,6 +83,9 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    # answers GETs with a 304 when the If-None-Match ETag still matches,
+    # the ETag hashes the rendered body so this saves bandwidth, not queries
+    "django.middleware.http.ConditionalGetMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -75,10 +102,16 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Only the admin, API docs and emails render templates, so
+            # find and compile them once per process
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    ["django.template.loaders.app_directories.Loader"],
+                ),
+            ],
             "context_processors": [
-                "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
@@ -100,10 +133,32 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        # Reuse connections across requests instead of reconnecting each time
+        "CONN_MAX_AGE": 60,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Shared between processes through Redis when REDIS_URL is set,
+# otherwise the per-process local memory cache is used.
+
+if ENV_CONFIG.redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": ENV_CONFIG.redis_url,
+        }
+    }
+
+# Caches cleared by signal receivers, like token lookups and lists, are
+# only used when the cache is shared. Clearing them has to reach every
+# worker, not just the one handling the request.
+SHARED_CACHE_ENABLED = bool(ENV_CONFIG.redis_url)
+TOKEN_CACHE_ENABLED = SHARED_CACHE_ENABLED
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -122,10 +177,14 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 dominates the cost of creating users in tests, hash with MD5 there
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 # Passwordless authentication
 PASSWORDLESS_AUTH = {
     'PASSWORDLESS_AUTH_TYPES': ['EMAIL'],
-    'PASSWORDLESS_EMAIL_NOREPLY_ADDRESS': env('EMAIL_HOST_USER'),
+    'PASSWORDLESS_EMAIL_NOREPLY_ADDRESS': ENV_CONFIG.email_host_user,
     # URL Prefix for Authentication Endpoints
     'PASSWORDLESS_AUTH_PREFIX': 'otp-auth/',
     #  URL Prefix for Verification Endpoints
@@ -169,27 +228,41 @@ AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': ['app.renderers.ORJSONRenderer'],
     # "DATETIME_FORMAT": "%d-%m-%Y",
     # "DATE_INPUT_FORMATS": ["%d-%m-%Y"],
     # 'DATE_FORMAT': "%d-%m-%Y",
 }
 
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    )
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
 
 
 CORS_ALLOW_ALL_ORIGINS = False
-if DEBUG:
-    CORS_ALLOW_CREDENTIALS = True
-    CORS_ALLOWED_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
-    CLIENT_HOST = env('CLIENT_HOST')
+# Comma separated origins of the client, the local client is allowed
+# by default while DEBUG is on
+CORS_ALLOWED_ORIGINS = env.list(
+    'CORS_ALLOWED_ORIGINS',
+    default=(
+        ['http://localhost:3000', 'http://127.0.0.1:3000'] if DEBUG else []
+    ),
+)
+# the client sends the auth_token cookie with its requests
+CORS_ALLOW_CREDENTIALS = True
+
+CLIENT_HOST = ENV_CONFIG.client_host
 
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = env('EMAIL_HOST')  # Specify your SMTP server here
+EMAIL_HOST = ENV_CONFIG.email_host  # Specify your SMTP server here
 EMAIL_PORT = 587  # Specify the port for your SMTP server
 EMAIL_USE_TLS = True  # TLS (Transport Layer Security) is usually recommended
-EMAIL_HOST_USER = env('EMAIL_HOST_USER')  # Your email address
-EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')  # Your email password
-DEFAULT_FROM_EMAIL = env('EMAIL_HOST_USER')  # Default sender email address
+EMAIL_HOST_USER = ENV_CONFIG.email_host_user  # Your email address
+EMAIL_HOST_PASSWORD = ENV_CONFIG.email_host_password  # Your email password
+DEFAULT_FROM_EMAIL = ENV_CONFIG.email_host_user  # Default sender email address
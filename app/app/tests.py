@@ -2,8 +2,11 @@
 Sample tests
 """
 
+from decimal import Decimal
+
 from django.test import SimpleTestCase
 from app import calc
+from app.renderers import ORJSONRenderer
 
 
 class CalcTests(SimpleTestCase):
@@ -20,3 +23,21 @@ class CalcTests(SimpleTestCase):
         res = calc.subtract(10, 15)
 
         self.assertEqual(res, 5)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer."""
+
+    def test_render_data(self):
+        """Test rendering data including types orjson can't encode."""
+        data = {'name': 'Pink Top', 'price': Decimal('10.99'), 'ids': [1, 2]}
+
+        res = ORJSONRenderer().render(data)
+
+        self.assertEqual(
+            res, b'{"name":"Pink Top","price":10.99,"ids":[1,2]}'
+        )
+
+    def test_render_none(self):
+        """Test rendering no data returns an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
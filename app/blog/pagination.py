@@ -0,0 +1,12 @@
+"""
+Pagination for blog APIs
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class BlogCursorPagination(CursorPagination):
+    """Paginate newest first by id using cursors instead of offsets."""
+
+    ordering = '-id'
+    page_size = 20
@@ -2,8 +2,13 @@
 Serializers for blog APIs
 """
 
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import models
 from rest_framework import serializers
 from core.models import Post, Comment, Tag
+from blog.signals import TAG_LIST_CACHE_KEY
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -15,41 +20,172 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class CommentListSerializer(serializers.ListSerializer):
+    """Serializer for a list of comments and their replies."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return self.child.bulk_serialize(iterable)
+
+
 class CommentSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.first_name')
     replies = serializers.SerializerMethodField()
+    # annotate whether the parent already has a reply so the view can
+    # check it without another query
+    parent_comment = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.annotate(
+            has_reply=models.Exists(
+                Comment.objects.filter(parent_comment=models.OuterRef('pk'))
+            )
+        ).only('id', 'parent_comment'),
+        allow_null=True,
+        required=False,
+    )
+
+    # columns read by the serializer, for read only list querysets
+    LIST_ONLY_FIELDS = [
+        'id',
+        'body',
+        'owner__first_name',
+        'post',
+        'parent_comment',
+    ]
 
     class Meta:
         model = Comment
         fields = ['id', 'body', 'owner', 'post', 'parent_comment', 'replies']
+        list_serializer_class = CommentListSerializer
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the related objects read by the serializer fields."""
+        return queryset.select_related('owner')
+
+    @staticmethod
+    def _to_node(pk, body, owner, post, parent_comment):
+        """Return the representation of a comment without replies."""
+        return {
+            'id': pk,
+            'body': body,
+            'owner': owner,
+            'post': post,
+            'parent_comment': parent_comment,
+            'replies': [],
+        }
+
+    @classmethod
+    def bulk_serialize(cls, comments):
+        """
+        Serialize comments with their replies, loading the replies
+        to all of the comments in one query.
+        """
+        nodes = [
+            cls._to_node(
+                comment.id,
+                comment.body,
+                comment.owner.first_name,
+                comment.post_id,
+                comment.parent_comment_id,
+            )
+            for comment in comments
+        ]
+        if not nodes:
+            return nodes
+
+        replies = Comment.objects.filter(
+            parent_comment_id__in={node['id'] for node in nodes},
+        ).values_list(
+            'id', 'body', 'owner__first_name', 'post_id', 'parent_comment_id'
+        )
+        children = defaultdict(list)
+        for row in replies:
+            children[row[4]].append(cls._to_node(*row))
+
+        # replies to replies are rejected, so the tree is one level deep
+        for node in nodes:
+            node['replies'] = children.get(node['id'], [])
+
+        return nodes
+
+    def validate_parent_comment(self, value):
+        """Only allow a single reply to a top-level comment."""
+        if value is None:
+            return value
+
+        # stop replies to replies
+        if value.parent_comment_id is not None:
+            raise serializers.ValidationError(
+                "Replies to replies are not allowed."
+            )
+
+        # the reply being updated doesn't count against its own parent
+        is_current_parent = (
+            self.instance is not None
+            and self.instance.parent_comment_id == value.id
+        )
+        if value.has_reply and not is_current_parent:
+            raise serializers.ValidationError(
+                "A parent comment can only have one reply."
+            )
+        return value
 
     def get_replies(self, obj):
         # Check if 'replies' is in the data
         if hasattr(obj, 'replies'):
-            # Recursively serialize replies
-            serializer = CommentSerializer(obj.replies, many=True)
-            return serializer.data
+            return self.bulk_serialize([obj])[0]['replies']
         return []
 
 
 class PostSerializer(serializers.ModelSerializer):
+    """Serializer for listing posts."""
+
     owner = serializers.ReadOnlyField(source='owner.first_name')
     comments = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
-    tags = TagSerializer(many=True, required=False)
+    tags = serializers.SlugRelatedField(
+        many=True, slug_field='name', read_only=True
+    )
+
+    # columns read by the serializer, for read only list querysets
+    LIST_ONLY_FIELDS = ['id', 'title', 'body', 'owner__first_name', 'image']
 
     class Meta:
         model = Post
         fields = ['id', 'title', 'body', 'owner', 'tags', 'comments', "image"]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the related objects read by the serializer fields."""
+        return queryset.select_related('owner').prefetch_related(
+            'tags', 'comments'
+        )
+
+
+class PostDetailSerializer(PostSerializer):
+    """Serializer for creating, viewing and updating a post."""
+
+    tags = TagSerializer(many=True, required=False)
+
     def _get_or_create_tags(self, tags, post):
         """Handle getting or creating tags as needed."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            post.tags.add(tag_obj)
+        names = list(dict.fromkeys(tag['name'] for tag in tags))
+        if not names:
+            return
+
+        user_tags = Tag.objects.filter(user=auth_user, name__in=names)
+        existing = set(user_tags.values_list('name', flat=True))
+        missing = [
+            Tag(user=auth_user, name=name)
+            for name in names
+            if name not in existing
+        ]
+        if missing:
+            Tag.objects.bulk_create(missing)
+            # bulk_create doesn't send post_save
+            cache.delete(TAG_LIST_CACHE_KEY)
+
+        post.tags.add(*user_tags)
 
     def create(self, validated_data):
         """Create a post."""
@@ -0,0 +1,19 @@
+"""
+Signal handlers for blog APIs
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Tag
+
+# cache key for the serialized tag list
+TAG_LIST_CACHE_KEY = 'tags:all'
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def clear_cached_tag_list(sender, **kwargs):
+    """Drop the cached tag list when a tag changes."""
+    cache.delete(TAG_LIST_CACHE_KEY)
@@ -2,7 +2,8 @@
 Tests for the blog API.
 """
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
@@ -23,17 +24,17 @@ TAG_URL = reverse("blog:tag-list")
 
 def post_detail_url(post_id):
     """Create and return a post detail URL."""
-    return reverse("blog:post-detail", args=[post_id])
+    return f"{POST_URL}{post_id}/"
 
 
 def comment_detail_url(comment_id):
     """Create and return a comment detail URL."""
-    return reverse("blog:comment-detail", args=[comment_id])
+    return f"{COMMENT_URL}{comment_id}/"
 
 
 def tag_detail_url(tag_id):
     """Create and return a tag detail URL."""
-    return reverse("blog:tag-detail", args=[tag_id])
+    return f"{TAG_URL}{tag_id}/"
 
 
 def create_blog_post(user, **params):
@@ -50,6 +51,19 @@ def create_blog_post(user, **params):
     return obj
 
 
+def create_blog_posts(user, count, **params):
+    """Create and return sample blog objects in a single query."""
+    defaults = {
+        "title": "How to choose the best gift",
+        "body": "Lorum ipsum",
+    }
+    defaults.update(params)
+
+    return Post.objects.bulk_create(
+        [Post(owner=user, **defaults) for _ in range(count)]
+    )
+
+
 def create_comment(user, post, **params):
     """Create and return a sample comment object."""
     defaults = {"body": "Lorum ipsum", "post": post}
@@ -274,6 +288,22 @@ class PrivateWishlistApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         # self.assertFalse(Comment.objects.filter(id=comment.id).exists())
 
+    def test_parent_comment_only_has_one_reply(self):
+        """test a comment that already has a reply can't be replied to"""
+        comment = create_comment(user=self.regular_user, post=self.blog_post)
+        create_comment(
+            user=self.admin_user, post=self.blog_post, parent_comment=comment
+        )
+        payload = {
+            "post": self.blog_post.id,
+            "body": "this is a second reply",
+            "parent_comment": comment.id,
+        }
+        self.client.force_authenticate(self.admin_user)
+        res = self.client.post(COMMENT_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(comment.replies.count(), 1)
+
     def test_authenticated_users_can_create_comment(self):
         """test authorized users can create a comment"""
         payload = {
@@ -346,15 +376,19 @@ class PrivateWishlistApiTests(TestCase):
         another_regular_user = User.objects.create(
             first_name='jess', email="jesspearson@example.com"
         )
-        create_comment(user=self.regular_user, post=self.blog_post)
-        create_comment(user=another_regular_user, post=self.blog_post)
+        Comment.objects.bulk_create(
+            [
+                Comment(owner=user, post=self.blog_post, body="Lorum ipsum")
+                for user in [self.regular_user, another_regular_user]
+            ]
+        )
 
         res = self.client.get(COMMENT_URL)
 
-        comment = Comment.objects.all().order_by("-id")
+        comment = Comment.objects.for_list_api()
         serializer = CommentSerializer(comment, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_list_all_posts(self):
         """test all admin posts are visible and listed"""
@@ -371,7 +405,147 @@ class PrivateWishlistApiTests(TestCase):
         post = Post.objects.all().order_by("-id")
         serializer = PostSerializer(post, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_posts_query_count_independent_of_posts(self):
+        """test listing posts does not query related objects per post"""
+        for _ in range(3):
+            post = create_blog_post(user=self.admin_user)
+            create_comment(user=self.regular_user, post=post)
+            post.tags.add(Tag.objects.create(user=self.admin_user, name="x"))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_comments_includes_replies(self):
+        """test replies are nested under their parent comment"""
+        for _ in range(3):
+            comment = create_comment(user=self.regular_user, post=self.blog_post)
+            create_comment(
+                user=self.admin_user,
+                post=self.blog_post,
+                parent_comment=comment,
+            )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(COMMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        for comment in res.data['results']:
+            self.assertEqual(len(comment['replies']), 1)
+            self.assertEqual(comment['replies'][0]['owner'], 'admin')
+
+    def test_create_post_with_existing_tags(self):
+        """test creating a post reuses the admins existing tags"""
+        gifts = Tag.objects.create(user=self.admin_user, name="gifts")
+        payload = {
+            "title": "admin post",
+            "body": "this is an admin post",
+            "tags": [{"name": "gifts"}, {"name": "birthday"}],
+        }
+        self.client.force_authenticate(self.admin_user)
+        res = self.client.post(POST_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(id=res.data['id'])
+        self.assertEqual(post.tags.count(), 2)
+        self.assertIn(gifts, post.tags.all())
+        self.assertEqual(
+            Tag.objects.filter(user=self.admin_user, name="gifts").count(), 1
+        )
+
+    def test_list_posts_returns_tag_names(self):
+        """test the post list returns tag names and detail returns tags"""
+        tag = Tag.objects.create(user=self.admin_user, name="gifts")
+        self.blog_post.tags.add(tag)
+
+        list_res = self.client.get(POST_URL)
+        detail_res = self.client.get(post_detail_url(self.blog_post.id))
+
+        self.assertEqual(list_res.data['results'][0]['tags'], ["gifts"])
+        self.assertEqual(
+            detail_res.data['tags'], [{"id": tag.id, "name": "gifts"}]
+        )
+
+    def test_list_posts_paginated(self):
+        """test the post list is returned in pages"""
+        create_blog_posts(user=self.admin_user, count=20)
+
+        res = self.client.get(POST_URL)
+        self.assertEqual(len(res.data['results']), 20)
+        self.assertIsNotNone(res.data['next'])
+
+        next_res = self.client.get(res.data['next'])
+        self.assertEqual(len(next_res.data['results']), 1)
+        self.assertEqual(next_res.data['results'][0]['id'], self.blog_post.id)
+
+    def test_comment_detail_includes_replies(self):
+        """test a comments replies are nested in the detail response"""
+        comment = create_comment(user=self.regular_user, post=self.blog_post)
+        reply = create_comment(
+            user=self.admin_user, post=self.blog_post, parent_comment=comment
+        )
+
+        res = self.client.get(comment_detail_url(comment.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['replies'],
+            [
+                {
+                    'id': reply.id,
+                    'body': reply.body,
+                    'owner': 'admin',
+                    'post': self.blog_post.id,
+                    'parent_comment': comment.id,
+                    'replies': [],
+                }
+            ],
+        )
+
+    def test_comment_replies_follow_parent_not_post(self):
+        """test a reply is nested under its parent whatever its post"""
+        comment = create_comment(user=self.regular_user, post=self.blog_post)
+        other_post = create_blog_post(user=self.admin_user)
+        reply = create_comment(
+            user=self.admin_user, post=other_post, parent_comment=comment
+        )
+
+        res = self.client.get(comment_detail_url(comment.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [reply_data['id'] for reply_data in res.data['replies']],
+            [reply.id],
+        )
+
+    @override_settings(SHARED_CACHE_ENABLED=True)
+    def test_tag_list_cached_until_tags_change(self):
+        """test the tag list is cached and refreshed when tags change"""
+        cache.clear()
+        Tag.objects.create(user=self.admin_user, name="gifts")
+        self.client.get(TAG_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAG_URL)
+        self.assertEqual([tag['name'] for tag in res.data], ["gifts"])
+
+        Tag.objects.create(user=self.admin_user, name="birthday")
+        res = self.client.get(TAG_URL)
+        self.assertEqual(len(res.data), 2)
+
+    @override_settings(SHARED_CACHE_ENABLED=False)
+    def test_tag_list_not_cached_without_shared_cache(self):
+        """test the tag list is not cached in a per process cache"""
+        cache.clear()
+        Tag.objects.create(user=self.admin_user, name="gifts")
+        self.client.get(TAG_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(TAG_URL)
 
 
 class ImageUploadTests(TestCase):
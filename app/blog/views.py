@@ -2,31 +2,52 @@
 Views for the blog API.
 """
 
+from django.conf import settings
+from django.core.cache import cache
 from core.models import Post, Comment, Tag
 from rest_framework import generics, status
 from blog.serializers import (
     PostSerializer,
+    PostDetailSerializer,
     CommentSerializer,
     TagSerializer,
 )
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
 )
-from rest_framework.authentication import TokenAuthentication
+from core.authentication import CachedTokenAuthentication
 from user.permissions import IsOwnerOrReadOnly, IsAdminOrReadOnly
+from blog.pagination import BlogCursorPagination
+from blog.signals import TAG_LIST_CACHE_KEY
 from rest_framework.response import Response
 
+# seconds the tag list is served from the cache
+TAG_LIST_CACHE_TIMEOUT = 60
+
 
 class PostListCreateView(generics.ListCreateAPIView):
     """View for managing post list and create APIs."""
 
     serializer_class = PostSerializer
     queryset = Post.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = BlogCursorPagination
     permission_classes = [
         IsAdminOrReadOnly,
     ]
 
+    def get_queryset(self):
+        """Retrieve posts with their owner, tags and comments."""
+        serializer_class = self.get_serializer_class()
+        queryset = serializer_class.setup_eager_loading(self.queryset)
+        return queryset.only(*serializer_class.LIST_ONLY_FIELDS)
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.request.method == 'POST':
+            return PostDetailSerializer
+        return self.serializer_class
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -34,26 +55,35 @@ class PostListCreateView(generics.ListCreateAPIView):
 class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     """View for managing a single post APIs."""
 
-    serializer_class = PostSerializer
+    serializer_class = PostDetailSerializer
 
     queryset = Post.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [
         IsAdminOrReadOnly,
     ]
 
+    def get_queryset(self):
+        """Retrieve a post with its owner, tags and comments."""
+        serializer_class = self.get_serializer_class()
+        return serializer_class.setup_eager_loading(self.queryset)
+
 
 class CommentListCreateView(generics.ListCreateAPIView):
     """View for managing comment List and Create APIs."""
 
     serializer_class = CommentSerializer
     queryset = Comment.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = BlogCursorPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         # Only return top-level comments (parent_comment is None)
-        return Comment.objects.filter(parent_comment=None)
+        queryset = Comment.objects.for_list_api()
+        serializer_class = self.get_serializer_class()
+        queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset.only(*serializer_class.LIST_ONLY_FIELDS)
 
     def create(self, request, *args, **kwargs):
         """overide create method to provide custom validation"""
@@ -61,28 +91,12 @@ class CommentListCreateView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Check if creating a parent comment or a reply
-        parent_comment_id = request.data.get('parent_comment')
-        if parent_comment_id:
-            # Check if the parent comment is a reply. stop replies to replies.
-            parent_comment = Comment.objects.get(pk=parent_comment_id)
-            if parent_comment.parent_comment is not None:
-                return Response(
-                    {"error": "Replies to replies are not allowed."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Check if the parent comment already has a reply
-            if Comment.objects.filter(
-                parent_comment=parent_comment_id
-            ).exists():
-                return Response(
-                    {"error": "A parent comment can only have one reply."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
+        # Check if creating a parent comment or a reply, the parent
+        # comment itself is validated by the serializer
+        parent_comment = serializer.validated_data.get('parent_comment')
+        if parent_comment is not None:
             # For replies, only allow admin users
-            if not IsAdminOrReadOnly().has_permission(request, self):
+            if not request.user.is_staff:
                 return Response(
                     {"error": "You do not have permission to create a reply."},
                     status=status.HTTP_403_FORBIDDEN,
@@ -106,18 +120,35 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = CommentSerializer
     queryset = Comment.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAdminOrReadOnly, IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        """Retrieve a comment with its owner and replies."""
+        serializer_class = self.get_serializer_class()
+        return serializer_class.setup_eager_loading(self.queryset)
+
 
 class TagListView(generics.ListAPIView):
     """View for managing tag List APIs."""
 
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAdminOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        """Return the tag list, cached for a short time."""
+        if not settings.SHARED_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        data = cache.get_or_set(
+            TAG_LIST_CACHE_KEY,
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+            TAG_LIST_CACHE_TIMEOUT,
+        )
+        return Response(data)
+
     def perform_create(self, serializer):
         """create a new tag"""
         serializer.save(owner=self.request.user)
@@ -128,5 +159,5 @@ class TagDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAdminOrReadOnly]
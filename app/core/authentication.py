@@ -0,0 +1,108 @@
+"""
+Authentication classes for the APIs.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# seconds a resolved token is trusted before it is looked up again
+TOKEN_CACHE_TIMEOUT = 60
+
+
+def token_cache_key(key):
+    """Return the cache key for an auth token."""
+    return f'tok:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def cached_user_fields():
+    """
+    Return the user columns kept with a cached token. The password
+    hash is left out and only loaded if a view reads it.
+    """
+    return [
+        field.attname
+        for field in get_user_model()._meta.concrete_fields
+        if field.attname != 'password'
+    ]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token and its user
+    so repeated requests with the same token skip the database.
+
+    Only enabled by TOKEN_CACHE_ENABLED, revoking a token must
+    clear the cached entry for every worker.
+    """
+
+    def authenticate_credentials(self, key):
+        if not settings.TOKEN_CACHE_ENABLED:
+            return super().authenticate_credentials(key)
+
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return self.credentials_from_cache(key, *cached)
+
+        user, token = super().authenticate_credentials(key)
+        user_values = {
+            field: getattr(user, field) for field in cached_user_fields()
+        }
+        cache.set(
+            cache_key, (user_values, token.created), TOKEN_CACHE_TIMEOUT
+        )
+        return user, token
+
+    def credentials_from_cache(self, key, user_values, created):
+        """Rebuild the user and token from their cached values."""
+        User = get_user_model()
+        # the password is deferred, so save() only writes loaded columns
+        user = User.from_db(
+            router.db_for_read(User),
+            list(user_values),
+            list(user_values.values()),
+        )
+        token = Token.from_db(
+            router.db_for_read(Token),
+            ['key', 'user_id', 'created'],
+            [key, user.pk, created],
+        )
+        # also caches the token as user.auth_token
+        token.user = user
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def clear_cached_token(sender, instance, **kwargs):
+    """Stop trusting a token once it is deleted."""
+    cache.delete(token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def clear_cached_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens so the next request sees the updated user."""
+    # a new user has no token yet, and nothing is cached without
+    # a shared cache
+    if created or not settings.TOKEN_CACHE_ENABLED:
+        return
+
+    # request.user already has its token loaded by the authentication
+    if sender.auth_token.is_cached(instance):
+        # a cached miss raises rather than returning None
+        try:
+            keys = [instance.auth_token.key]
+        except Token.DoesNotExist:
+            keys = []
+    else:
+        keys = Token.objects.filter(user=instance).values_list(
+            'key', flat=True
+        )
+    cache.delete_many([token_cache_key(key) for key in keys])
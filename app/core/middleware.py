@@ -1,12 +1,14 @@
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework.authtoken.models import Token
-from rest_framework.exceptions import AuthenticationFailed
-from django.urls import resolve
 from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from core.authentication import CachedTokenAuthentication
 
 # from rest_framework.authentication import get_authorization_header
 # from django.middleware.csrf import CsrfViewMiddleware
 
+# paths whose response token is moved into the auth_token cookie
+OTP_TOKEN_PATHS = frozenset(['/api/user/otp-auth/token/'])
+
 
 class CookieTokenAuthenticationMiddleware(MiddlewareMixin):
     """
@@ -15,16 +17,25 @@ class CookieTokenAuthenticationMiddleware(MiddlewareMixin):
     """
 
     def process_request(self, request):
+        # CORS preflight requests never need an authenticated user
+        if request.method == 'OPTIONS':
+            return None
+
         # Extract the auth token from the cookie
         auth_token = request.COOKIES.get('auth_token')
         if auth_token:
+            # shares the token lookup with the views' token authentication
             try:
-                token = Token.objects.get(key=auth_token)
-                request.user = token.user
-                # Set the Authorization header for DRF to process
-                request.META['HTTP_AUTHORIZATION'] = f'Token {auth_token}'
-            except Token.DoesNotExist:
-                raise AuthenticationFailed('Invalid token')
+                user, _ = CachedTokenAuthentication().authenticate_credentials(
+                    auth_token
+                )
+            except AuthenticationFailed:
+                # unknown token or inactive user, leave the request
+                # anonymous so protected views answer with DRF's 401
+                return None
+            request.user = user
+            # Set the Authorization header for DRF to process
+            request.META['HTTP_AUTHORIZATION'] = f'Token {auth_token}'
 
 
 class CookieOTPTokenAuthenticationMiddleware:
@@ -39,11 +50,12 @@ class CookieOTPTokenAuthenticationMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
+        # CORS preflight responses never carry a token
+        if request.method == 'OPTIONS':
+            return response
+
         # Check if the request path matches the specific URL(s)
-        match = resolve(request.path)
-        if match.route in [
-            'api/user/otp-auth/token/'
-        ]:  # replace with your view name
+        if request.path in OTP_TOKEN_PATHS:
             # Check if the response contains the authToken
             auth_token = (
                 response.data.get('token')
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['user', '-name'], name='product_user_name_idx'),
+        ),
+    ]
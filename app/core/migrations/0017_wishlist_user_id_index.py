@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_product_user_name_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['user', '-id'], name='wishlist_user_id_idx'),
+        ),
+    ]
@@ -44,12 +44,9 @@ class UserManager(BaseUserManager):
 
     def create_superuser(self, email, password):
         """Create and return a new superuser."""
-        user = self.create_user(email, password)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save(using=self._db)
-
-        return user
+        return self.create_user(
+            email, password, is_staff=True, is_superuser=True
+        )
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -103,6 +100,15 @@ class Wishlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # matches the WishlistViewSet list ordering
+            models.Index(
+                fields=['user', '-id'],
+                name='wishlist_user_id_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -135,6 +141,15 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # matches the ProductViewSet list ordering
+            models.Index(
+                fields=['user', '-name'],
+                name='product_user_name_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -158,6 +173,14 @@ class Post(models.Model):
         ordering = ("-created_at",)
 
 
+class CommentQuerySet(models.QuerySet):
+    """Queries for comments."""
+
+    def for_list_api(self):
+        """Return top-level comments, newest first."""
+        return self.filter(parent_comment=None).order_by('-id')
+
+
 class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -178,8 +201,22 @@ class Comment(models.Model):
         related_name='replies',
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=['post', 'parent_comment'],
+                name='comment_post_parent_idx',
+            ),
+            # matches CommentQuerySet.for_list_api
+            models.Index(
+                fields=['-id'],
+                name='comment_top_level_id_idx',
+                condition=models.Q(parent_comment__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.owner.first_name}'s comment: {self.body}"
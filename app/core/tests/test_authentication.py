@@ -0,0 +1,112 @@
+"""
+Tests for the cached token authentication.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, token_cache_key
+
+
+@override_settings(TOKEN_CACHE_ENABLED=True)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test caching of token lookups."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_repeated_lookup_uses_cache(self):
+        """Test the token is only looked up in the database once."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_deleted_token_is_rejected(self):
+        """Test a deleted token is no longer accepted from the cache."""
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    def test_inactive_user_is_rejected(self):
+        """Test deactivating a user clears their cached token."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_password_hash_not_cached(self):
+        """Test the cached user leaves out the password hash."""
+        self.auth.authenticate_credentials(self.token.key)
+        user_values, _ = cache.get(token_cache_key(self.token.key))
+
+        self.assertNotIn('password', user_values)
+
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        user.first_name = 'Changed'
+        user.save()
+        user = get_user_model().objects.get(id=self.user.id)
+
+        self.assertEqual(user.first_name, 'Changed')
+        self.assertTrue(user.check_password('testpass123'))
+
+    @override_settings(TOKEN_CACHE_ENABLED=False)
+    def test_lookup_not_cached_when_disabled(self):
+        """Test tokens are looked up every time without a shared cache."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
+
+    def test_new_user_skips_token_lookup(self):
+        """Test creating a user doesn't look up tokens to clear."""
+        with self.assertNumQueries(1):
+            get_user_model().objects.create_user(
+                email='other@example.com',
+                password='testpass123',
+            )
+
+    def test_saving_authenticated_user_uses_loaded_token(self):
+        """Test saving request.user clears its token without a lookup."""
+        self.auth.authenticate_credentials(self.token.key)
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        # drfpasswordless reads the old email, then the UPDATE
+        with self.assertNumQueries(2):
+            user.save(update_fields=['first_name'])
+
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
+
+    def test_saving_user_without_token(self):
+        """Test saving a user already known to have no token."""
+        user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.assertFalse(hasattr(user, 'auth_token'))
+
+        user.first_name = 'Changed'
+        user.save()
+
+        self.assertEqual(
+            get_user_model().objects.get(id=user.id).first_name, 'Changed'
+        )
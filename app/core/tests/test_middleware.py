@@ -0,0 +1,122 @@
+"""
+Tests for the custom middleware.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from rest_framework.authtoken.models import Token
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.middleware import (
+    CookieTokenAuthenticationMiddleware,
+    CookieOTPTokenAuthenticationMiddleware,
+)
+
+
+class CookieTokenAuthenticationMiddlewareTests(TestCase):
+    """Test the cookie token middleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CookieTokenAuthenticationMiddleware(
+            lambda request: None
+        )
+
+    def test_token_cookie_sets_user_and_header(self):
+        """Test a valid token cookie authenticates the request."""
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=user)
+        request = self.factory.get('/api/user/me/')
+        request.COOKIES['auth_token'] = token.key
+
+        self.middleware.process_request(request)
+
+        self.assertEqual(request.user, user)
+        self.assertEqual(
+            request.META['HTTP_AUTHORIZATION'], f'Token {token.key}'
+        )
+
+    def test_invalid_token_cookie_left_anonymous(self):
+        """Test an unknown token in the cookie doesn't authenticate."""
+        request = self.factory.get('/api/user/me/')
+        request.COOKIES['auth_token'] = 'invalid'
+
+        self.middleware.process_request(request)
+
+        self.assertFalse(hasattr(request, 'user'))
+        self.assertNotIn('HTTP_AUTHORIZATION', request.META)
+
+    def test_inactive_user_cookie_left_anonymous(self):
+        """Test an inactive user's token cookie doesn't authenticate."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            is_active=False,
+        )
+        token = Token.objects.create(user=user)
+        request = self.factory.get('/api/user/me/')
+        request.COOKIES['auth_token'] = token.key
+
+        self.middleware.process_request(request)
+
+        self.assertFalse(hasattr(request, 'user'))
+        self.assertNotIn('HTTP_AUTHORIZATION', request.META)
+
+    def test_invalid_token_cookie_gets_401(self):
+        """Test protected views answer an unknown token cookie with 401."""
+        self.client.cookies['auth_token'] = 'invalid'
+
+        res = self.client.get(reverse('user:me'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_cookie_public_view(self):
+        """Test public views still answer with an unknown token cookie."""
+        self.client.cookies['auth_token'] = 'invalid'
+
+        res = self.client.get(reverse('blog:post-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_preflight_skips_token_lookup(self):
+        """Test OPTIONS requests don't look up the token cookie."""
+        request = self.factory.options('/api/user/me/')
+        request.COOKIES['auth_token'] = 'invalid'
+
+        with self.assertNumQueries(0):
+            self.middleware.process_request(request)
+
+        self.assertNotIn('HTTP_AUTHORIZATION', request.META)
+
+
+class CookieOTPTokenAuthenticationMiddlewareTests(TestCase):
+    """Test the OTP token cookie middleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CookieOTPTokenAuthenticationMiddleware(
+            lambda request: Response({'token': 'abc123'})
+        )
+
+    def test_otp_token_set_in_cookie(self):
+        """Test the OTP token response sets the auth_token cookie."""
+        request = self.factory.post('/api/user/otp-auth/token/')
+
+        response = self.middleware(request)
+
+        self.assertEqual(response.cookies['auth_token'].value, 'abc123')
+
+    def test_other_paths_not_changed(self):
+        """Test responses for other or unknown paths are left alone."""
+        request = self.factory.post('/api/does-not-exist/')
+
+        response = self.middleware(request)
+
+        self.assertNotIn('auth_token', response.cookies)
@@ -16,11 +16,13 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        if obj.owner:
+        # Compare the foreign key ids so the related user isn't fetched
+        owner_id = getattr(obj, 'owner_id', None)
+        if owner_id:
             # Instance must have an attribute named `owner`.
-            return obj.owner == request.user
+            return owner_id == request.user.id
         else:
-            return obj.user == request.user
+            return obj.user_id == request.user.id
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -11,6 +11,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+User = get_user_model()
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
@@ -37,7 +39,7 @@ class UserSerializer(serializers.ModelSerializer):
             self.fields.get('password').read_only = True
 
     class Meta:
-        model = get_user_model()
+        model = User
         fields = [
             'email',
             # 'confirm_email',
@@ -80,18 +82,16 @@ class UserSerializer(serializers.ModelSerializer):
         # validated_data.pop('confirm_email', None)
         validated_data.pop('confirm_password', None)
 
-        return get_user_model().objects.create_user(**validated_data)
+        return User.objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
         """Update and return user."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
-
         if password:
-            user.set_password(password)
-            user.save()
+            # saved along with the other fields by super().update()
+            instance.set_password(password)
 
-        return user
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -145,21 +145,22 @@ class ChangePasswordSerializer(serializers.Serializer):
         required=True,
     )
 
-    def validate_old_password(self, value):
-        user = self.context['request'].user
-        if not user.check_password(value):
-            raise serializers.ValidationError(
-                _(
-                    'Your old password was entered incorrectly. Please enter it again.'  # noqa: E501
-                )
-            )
-        return value
-
     def validate(self, data):
         if data['new_password1'] != data['new_password2']:
             raise serializers.ValidationError(
                 {'new_password2': _("The two password fields didn't match.")}
             )
+        # Hashing the old password is the slowest check, so it only
+        # runs once the cheaper checks have passed
+        user = self.context['request'].user
+        if not user.check_password(data['old_password']):
+            raise serializers.ValidationError(
+                {
+                    'old_password': _(
+                        'Your old password was entered incorrectly. Please enter it again.'  # noqa: E501
+                    )
+                }
+            )
         password_validation.validate_password(
             data['new_password1'], self.context['request'].user
         )
@@ -196,11 +197,6 @@ class ChangeEmailSerializer(serializers.Serializer):
     def validate(self, data):
         user = self.context['request'].user
 
-        # Validate password
-        password = data.get('password')
-        if not user.check_password(password):
-            raise serializers.ValidationError(_("Incorrect password."))
-
         # Validate new email and confirmation
         new_email = data.get('new_email')
         confirm_email = data.get('confirm_email')
@@ -208,13 +204,20 @@ class ChangeEmailSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 _("New email and confirmation do not match.")
             )
+
+        # Validate password, after the cheaper checks as hashing is slow
+        password = data.get('password')
+        if not user.check_password(password):
+            raise serializers.ValidationError(_("Incorrect password."))
         return data
 
     def save(self, **kwargs):
         email = self.validated_data['new_email']
         user = self.context['request'].user
         user.email = email
-        user.save()
+        # drfpasswordless unverifies a changed email in pre_save, and
+        # auto_now only sets updated_at when it is listed
+        user.save(update_fields=['email', 'is_verified', 'updated_at'])
         return user
 
 
@@ -2,22 +2,33 @@
 Tests for the user API.
 """
 
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.urls import reverse_lazy
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APIClient
 from rest_framework import status
+from core.authentication import CachedTokenAuthentication
 from core.models import User
 
 
-CREATE_USER_URL = reverse('user:create')
-TOKEN_URL = reverse('user:token')
-ME_URL = reverse('user:me')
-CHANGE_PASSWORD_URL = reverse('user:change-password')
-CHANGE_EMAIL_URL = reverse('user:change-email')
-DELETE_USER_URL = reverse('user:delete-user')
-LOGOUT_URL = reverse('user:logout')
+CREATE_USER_URL = reverse_lazy('user:create')
+TOKEN_URL = reverse_lazy('user:token')
+ME_URL = reverse_lazy('user:me')
+CHANGE_PASSWORD_URL = reverse_lazy('user:change-password')
+CHANGE_EMAIL_URL = reverse_lazy('user:change-email')
+DELETE_USER_URL = reverse_lazy('user:delete-user')
+LOGOUT_URL = reverse_lazy('user:logout')
+VERIFY_URL = reverse_lazy('user:verify')
+RESET_PASSWORD_URL = reverse_lazy('user:password_reset_request')
+RESET_PASSWORD_CONFIRM_URL = reverse_lazy('user:password_reset_confirm')
 
 
 def create_user(**params):
@@ -129,6 +140,19 @@ class PublicUserApiTests(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_reuses_existing_token(self):
+        """Test logging in again returns the users existing token."""
+        user = create_user(email='test@example.com', password='goodpass')
+        token = Token.objects.create(user=user)
+
+        payload = {'email': 'test@example.com', 'password': 'goodpass'}
+        with self.assertNumQueries(2):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['token'], token.key)
+        self.assertEqual(res.cookies['auth_token'].value, token.key)
+
     def test_create_token_bad_credentials(self):
         """Test returns error if credentials invalid."""
         create_user(email='test@example.com', password='goodpass')
@@ -155,6 +179,76 @@ class PublicUserApiTests(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_request_reset_password_unknown_email(self):
+        """Test reset request for an unknown email looks like a success."""
+        payload = {'email': 'missing@example.com'}
+
+        with self.assertNumQueries(1):
+            res = self.client.post(RESET_PASSWORD_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_reset_password_token_single_use(self):
+        """Test a password reset link can not be used twice."""
+        user = create_user(email='test@example.com', password='goodpass')
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        token = default_token_generator.make_token(user)
+        url = f'{RESET_PASSWORD_CONFIRM_URL}?uidb64={uidb64}&token={token}'
+        payload = {
+            'password': 'new-password-123',
+            'confirm_password': 'new-password-123',
+        }
+
+        updated_at = user.updated_at
+
+        res = self.client.post(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password(payload['password']))
+        self.assertGreater(user.updated_at, updated_at)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reset_password_revokes_auth_token(self):
+        """Test a password reset logs out existing auth tokens."""
+        user = create_user(email='test@example.com', password='goodpass')
+        auth_token = Token.objects.create(user=user)
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        token = default_token_generator.make_token(user)
+        url = f'{RESET_PASSWORD_CONFIRM_URL}?uidb64={uidb64}&token={token}'
+        payload = {
+            'password': 'new-password-123',
+            'confirm_password': 'new-password-123',
+        }
+
+        res = self.client.post(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {auth_token.key}')
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_verify_user(self):
+        """Test the verification link verifies the user."""
+        user = create_user(email='test@example.com', password='goodpass')
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        token = default_token_generator.make_token(user)
+        updated_at = user.updated_at
+
+        res = self.client.get(
+            VERIFY_URL, {'uidb64': uidb64, 'token': token}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.is_verified)
+        self.assertGreater(user.updated_at, updated_at)
+
     def test_retrieve_user_unauthorized(self):
         """Test authentication is required for users."""
         res = self.client.get(ME_URL)
@@ -165,8 +259,9 @@ class PublicUserApiTests(TestCase):
 class PrivateUserApiTests(TestCase):
     """Test API requests that require authentication."""
 
-    def setUp(self):
-        self.user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(
             email='test@example.com',
             password='testpass123',
             first_name='Test Name',
@@ -174,12 +269,15 @@ class PrivateUserApiTests(TestCase):
             gender='female',
             birthday="2023-11-15",
         )
+
+    def setUp(self):
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
 
     def test_retrieve_profile_success(self):
         """Test retrieving profile for logged in user."""
-        res = self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(
@@ -199,6 +297,7 @@ class PrivateUserApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @override_settings(TOKEN_CACHE_ENABLED=False)
     def test_update_user_profile(self):
         """Test updating the user profile for the authenticated user."""
         payload = {
@@ -206,13 +305,15 @@ class PrivateUserApiTests(TestCase):
             'last_name': 'updated last name',
         }
 
-        res = self.client.patch(ME_URL, payload)
+        with self.assertNumQueries(2):
+            res = self.client.patch(ME_URL, payload)
 
         self.user.refresh_from_db()
         self.assertEqual(self.user.first_name, payload['first_name'])
         self.assertTrue(self.user.last_name, (payload['last_name']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    @override_settings(TOKEN_CACHE_ENABLED=False)
     def test_update_password(self):
         """Test update password for authenticated user"""
         payload = {
@@ -221,12 +322,72 @@ class PrivateUserApiTests(TestCase):
             "new_password2": "updated-password",
         }
 
-        res = self.client.patch(CHANGE_PASSWORD_URL, payload, format='json')
+        with self.assertNumQueries(4):
+            res = self.client.patch(
+                CHANGE_PASSWORD_URL, payload, format='json'
+            )
 
         updated_user = User.objects.get(email='test@example.com')
         self.assertTrue(updated_user.check_password(payload['new_password1']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_update_password_rotates_token(self):
+        """Test updating the password replaces the users auth token"""
+        old_token = Token.objects.create(user=self.user)
+        payload = {
+            "old_password": "testpass123",
+            "new_password1": "updated-password",
+            "new_password2": "updated-password",
+        }
+
+        res = self.client.patch(CHANGE_PASSWORD_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], old_token.key)
+        self.assertFalse(Token.objects.filter(key=old_token.key).exists())
+        self.assertEqual(Token.objects.get(user=self.user).key, res.data['token'])
+
+    @override_settings(TOKEN_CACHE_ENABLED=True)
+    def test_update_password_evicts_recached_old_token(self):
+        """Test the old token isn't trusted from the cache after rotation"""
+        cache.clear()
+        old_token = Token.objects.create(user=self.user)
+        auth = CachedTokenAuthentication()
+
+        def recache_old_token(sender, instance, **kwargs):
+            # a request with the old key arriving after the user is saved
+            auth.authenticate_credentials(old_token.key)
+
+        post_save.connect(recache_old_token, sender=User)
+        self.addCleanup(post_save.disconnect, recache_old_token, sender=User)
+        payload = {
+            "old_password": "testpass123",
+            "new_password1": "updated-password",
+            "new_password2": "updated-password",
+        }
+
+        res = self.client.patch(CHANGE_PASSWORD_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials(old_token.key)
+
+    def test_update_password_wrong_old_password(self):
+        """Test update password fails if the old password is wrong"""
+        payload = {
+            "old_password": "wrong-password",
+            "new_password1": "updated-password",
+            "new_password2": "updated-password",
+        }
+
+        res = self.client.patch(CHANGE_PASSWORD_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('old_password', res.data)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(TOKEN_CACHE_ENABLED=False)
     def test_update_email(self):
         """Test update email for authenticated user"""
         payload = {
@@ -234,11 +395,17 @@ class PrivateUserApiTests(TestCase):
             'confirm_email': 'updated@example.com',
             'password': 'testpass123',
         }
+        User.objects.filter(id=self.user.id).update(is_verified=True)
+        self.user.is_verified = True
+        updated_at = self.user.updated_at
 
-        res = self.client.put(CHANGE_EMAIL_URL, payload, format='json')
+        with self.assertNumQueries(2):
+            res = self.client.put(CHANGE_EMAIL_URL, payload, format='json')
         updated_user = User.objects.get(first_name=self.user.first_name)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(updated_user.email, payload['new_email'])
+        self.assertFalse(updated_user.is_verified)
+        self.assertGreater(updated_user.updated_at, updated_at)
 
     # TO-DO: add new tests
     # def test_update_email_sends_new_verification_link(self):
@@ -252,7 +419,8 @@ class PrivateUserApiTests(TestCase):
         """Test log out user"""
         token = Token.objects.create(user=self.user)
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
-        res = self.client.post(LOGOUT_URL)
+        with self.assertNumQueries(1):
+            res = self.client.post(LOGOUT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         with self.assertRaises(Token.DoesNotExist):
@@ -262,9 +430,28 @@ class PrivateUserApiTests(TestCase):
         #     response_after_logout.status_code, status.HTTP_401_UNAUTHORIZED
         # )
 
+    def test_logout_user_with_token_only(self):
+        """Test log out deletes the token used to authenticate"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        res = client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(key=token.key).exists())
+
+        response_after_logout = client.get(ME_URL)
+        self.assertEqual(
+            response_after_logout.status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    @override_settings(TOKEN_CACHE_ENABLED=False)
     def test_delete_user_soft_delete(self):
         """Test delete user soft deletes the user"""
-        res = self.client.delete(DELETE_USER_URL)
+        updated_at = self.user.updated_at
+        with self.assertNumQueries(2):
+            res = self.client.delete(DELETE_USER_URL)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         deleted_user = User.objects.get(email='test@example.com')
         self.assertFalse(deleted_user.is_active)
+        self.assertGreater(deleted_user.updated_at, updated_at)
@@ -2,7 +2,7 @@
 Views for the user API.
 """
 
-from rest_framework import generics, authentication, permissions, status
+from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
@@ -11,12 +11,13 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth import update_session_auth_hash, get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.cache import cache
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_text
+from django.utils.encoding import force_bytes
 
 # from django.middleware.csrf import get_token
 
+from core.authentication import CachedTokenAuthentication, token_cache_key
 from core.utils import EmailUtil
 from user.serializers import (
     UserSerializer,
@@ -27,6 +28,13 @@ from user.serializers import (
     PasswordResetConfirmSerializer,
 )
 
+User = get_user_model()
+
+# columns default_token_generator hashes, plus is_verified for verification
+TOKEN_USER_FIELDS = ['id', 'password', 'last_login', 'email', 'is_verified']
+# raised by decoding a bad uidb64 or looking up a missing user
+UID_LOOKUP_ERRORS = (TypeError, ValueError, OverflowError, User.DoesNotExist)
+
 
 def verification_email_data(request):
     """returns the subject, body and to email for user verification"""
@@ -46,6 +54,15 @@ def verification_email_data(request):
     return data
 
 
+def user_from_uidb64(uidb64):
+    """returns the user encoded in a verification or reset link, or None"""
+    try:
+        uid = urlsafe_base64_decode(uidb64).decode()
+        return User.objects.only(*TOKEN_USER_FIELDS).get(pk=uid)
+    except UID_LOOKUP_ERRORS:
+        return None
+
+
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
 
@@ -54,28 +71,12 @@ class CreateUserView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # new users are created with is_verified=False, so no second save
         user = serializer.save()
-        user.is_verified = False
-        user.save()
-
-        # Generate token for email verification
-        token = default_token_generator.make_token(user)
-        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
 
-        scheme = request.scheme
-        # Send verification email
-
-        client_site = settings.CLIENT_HOST
-
-        mail_subject = 'Activate your account'
-        message = f'Click the link to verify your email: {scheme}://{client_site}/auth/email-verify?uidb64={uidb64}&token={token}'  # noqa: E501
-        # message = f'Click the link to verify your email: {scheme}://{current_site}{reverse("user:verify", kwargs={"uidb64": urlsafe_base64_encode(force_bytes(user.pk)), "token": token})}'  # noqa: E501
-        send_mail(
-            mail_subject, message, from_email='', recipient_list=[user.email]
-        )
-
-        # Create authentication token
-        token, _ = Token.objects.get_or_create(user=user)
+        # Create authentication token, the user was just created so
+        # there is no existing token to look up
+        token = Token.objects.create(user=user)
 
         response_data = {'token': token.key}
         response = Response(response_data, status.HTTP_201_CREATED)
@@ -96,6 +97,26 @@ class CreateUserView(generics.CreateAPIView):
         #     status=status.HTTP_201_CREATED,
         # )
 
+        # Generate token for email verification
+        verify_token = default_token_generator.make_token(user)
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+
+        scheme = request.scheme
+        # Send verification email last, once the response is ready
+
+        client_site = settings.CLIENT_HOST
+
+        mail_subject = 'Activate your account'
+        message = f'Click the link to verify your email: {scheme}://{client_site}/auth/email-verify?uidb64={uidb64}&token={verify_token}'  # noqa: E501
+        # message = f'Click the link to verify your email: {scheme}://{current_site}{reverse("user:verify", kwargs={"uidb64": urlsafe_base64_encode(force_bytes(user.pk)), "token": token})}'  # noqa: E501
+        EmailUtil.send_email(
+            data={
+                'email_body': message,
+                'to_email': user.email,
+                'email_subject': mail_subject,
+            }
+        )
+
         return response
 
 
@@ -107,16 +128,7 @@ class UserVerificationAPIView(APIView):
     def get(self, request):
         uidb64 = request.query_params.get('uidb64')
         token = request.query_params.get('token')
-        try:
-            uid = urlsafe_base64_decode(uidb64).decode()
-            user = get_user_model().objects.get(pk=uid)
-        except (
-            TypeError,
-            ValueError,
-            OverflowError,
-            get_user_model().DoesNotExist,
-        ):
-            user = None
+        user = user_from_uidb64(uidb64)
         if user is not None and default_token_generator.check_token(
             user, token
         ):
@@ -126,10 +138,9 @@ class UserVerificationAPIView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             else:
+                # reusing the link after this returns 'already verified'
                 user.is_verified = True
-                user.save()
-                # TO-DO Invalidate the token
-                # You can delete the token from the database or mark it as used, depending on your implementation # noqa: E501
+                user.save(update_fields=['is_verified', 'updated_at'])
                 return Response(
                     {'message': 'Your account has been verified'},
                     status=status.HTTP_200_OK,
@@ -144,7 +155,7 @@ class UserVerificationAPIView(APIView):
 class ResendVerificationLinkAPIView(generics.GenericAPIView):
     """Resent user verification link by email"""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -175,8 +186,13 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        token = Token.objects.get(key=response.data['token'])
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # one SELECT when the user already has a token, the token
+        # object is used directly instead of re-fetching it by key
+        token, _ = Token.objects.get_or_create(
+            user=serializer.validated_data['user']
+        )
         # csrf_token = get_token(request)
 
         # Create the response with token data
@@ -206,7 +222,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -217,7 +233,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 class ChangePasswordView(generics.UpdateAPIView):
     """Change password for the authenticated user."""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChangePasswordSerializer
 
@@ -227,21 +243,33 @@ class ChangePasswordView(generics.UpdateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        # update session with new auth hash
-        update_session_auth_hash(request, user)
-
-        # if using drf authtoken, create a new token
-        if hasattr(user, 'auth_token'):
-            user.auth_token.delete()
-        token, created = Token.objects.get_or_create(user=user)
+        # update session with new auth hash, token only clients
+        # have no session to keep
+        if request.session.session_key:
+            update_session_auth_hash(request, user)
+
+        # if using drf authtoken, rotate the key in place. The UPDATE
+        # sends no signal, and a request with the old key may have cached
+        # it again since the user was saved, so evict it afterwards
+        token_key = Token.generate_key()
+        old_key = (
+            Token.objects.filter(user=user)
+            .values_list('key', flat=True)
+            .first()
+        )
+        if old_key is None:
+            Token.objects.create(user=user, key=token_key)
+        else:
+            Token.objects.filter(user=user).update(key=token_key)
+            cache.delete(token_cache_key(old_key))
         # return new token
-        return Response({'token': token.key}, status=status.HTTP_200_OK)
+        return Response({'token': token_key}, status=status.HTTP_200_OK)
 
 
 class ChangeEmailView(generics.UpdateAPIView):
     """Change email for the authenticated user."""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChangeEmailSerializer
 
@@ -275,36 +303,43 @@ class PasswordResetRequestAPIView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
-        try:
-            user = get_user_model().objects.get(email=email)
-            # Generate password reset token
-            scheme = request.scheme
-            uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-            token = default_token_generator.make_token(user)
-            # Construct reset password link
-            # current_site = get_current_site(request)
-
-            client_site = settings.CLIENT_HOST
-            reset_password_link = f'{scheme}://{client_site}/auth/reset-password?uidb64={uidb64}&token={token}'  # noqa: E501
-
-            # reset_password_link = f'{scheme}://{current_site}{reverse("user:password_reset_confirm",kwargs={"uidb64": uid, "token": token})}'  # noqa: E501
-
-            # Send email with password reset link
-            subject = 'Password Reset'
-            message = f'Follow this link to reset your password: {reset_password_link}'  # noqa: E501
-            # TO-DO make token expire after some time
-            # Logic to send email
-            send_mail(subject, message, None, [email])
-            return Response(
-                {'message': 'Password reset email sent'},
-                status=status.HTTP_200_OK,
-            )
-        except get_user_model().DoesNotExist:
-            pass  # Handle case where email doesn't exist without leaking information # noqa: E501
-        return Response(
-            {'error': 'User with this email does not exist'},
-            status=status.HTTP_400_BAD_REQUEST,
+        # same response whether or not the email exists so the endpoint
+        # can not be used to find out which emails are registered
+        response = Response(
+            {'message': 'Password reset email sent'},
+            status=status.HTTP_200_OK,
+        )
+        user = (
+            User.objects.only(*TOKEN_USER_FIELDS).filter(email=email).first()
+        )
+        if user is None:
+            return response
+
+        # Generate password reset token
+        scheme = request.scheme
+        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+        token = default_token_generator.make_token(user)
+        # Construct reset password link
+        # current_site = get_current_site(request)
+
+        client_site = settings.CLIENT_HOST
+        reset_password_link = f'{scheme}://{client_site}/auth/reset-password?uidb64={uidb64}&token={token}'  # noqa: E501
+
+        # reset_password_link = f'{scheme}://{current_site}{reverse("user:password_reset_confirm",kwargs={"uidb64": uid, "token": token})}'  # noqa: E501
+
+        # Send email with password reset link
+        subject = 'Password Reset'
+        message = f'Follow this link to reset your password: {reset_password_link}'  # noqa: E501
+        # TO-DO make token expire after some time
+        # Logic to send email
+        EmailUtil.send_email(
+            data={
+                'email_body': message,
+                'to_email': email,
+                'email_subject': subject,
+            }
         )
+        return response
 
 
 class PasswordResetConfirmAPIView(generics.CreateAPIView):
@@ -315,25 +350,15 @@ class PasswordResetConfirmAPIView(generics.CreateAPIView):
     def get(self, request):
         uidb64 = request.query_params.get('uidb64')
         token = request.query_params.get('token')
-        try:
-            # Decode the uidb64 and validate the token
-            uid = force_text(urlsafe_base64_decode(uidb64))
-            user = get_user_model().objects.get(pk=uid)
-            if default_token_generator.check_token(user, token):
-                return Response(
-                    {'message': 'Token is valid'}, status=status.HTTP_200_OK
-                )
-            else:
-                return Response(
-                    {'message': 'Invalid token'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        except (
-            TypeError,
-            ValueError,
-            OverflowError,
-            get_user_model().DoesNotExist,
+        # Decode the uidb64 and validate the token
+        user = user_from_uidb64(uidb64)
+        if user is not None and default_token_generator.check_token(
+            user, token
         ):
+            return Response(
+                {'message': 'Token is valid'}, status=status.HTTP_200_OK
+            )
+        else:
             return Response(
                 {'message': 'Invalid token'},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -347,41 +372,36 @@ class PasswordResetConfirmAPIView(generics.CreateAPIView):
         uidb64 = request.query_params.get('uidb64')
         token = request.query_params.get('token')
 
-        try:
-            uid = force_text(urlsafe_base64_decode(uidb64))
-            user = get_user_model().objects.get(pk=uid)
-            if default_token_generator.check_token(user, token):
-                user.set_password(password)
-                user.save()
-                # TO-DO invalidate token.
-                # Example: TokenModel.objects.filter(user=user).delete()
-                return Response(
-                    {'message': 'Password reset successful'},
-                    status=status.HTTP_200_OK,
-                )
-            else:
-                return Response(
-                    {'error': 'Invalid link'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-                # raise ValidationError('Invalid token')
-        except (
-            TypeError,
-            ValueError,
-            OverflowError,
-            get_user_model().DoesNotExist,
-        ):
+        user = user_from_uidb64(uidb64)
+        if user is None:
             return Response(
                 {'error': 'Invalid request'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if default_token_generator.check_token(user, token):
+            # the reset token hashes the password, so changing it
+            # invalidates the reset link
+            user.set_password(password)
+            user.save(update_fields=['password', 'updated_at'])
+            # log out every client, post_delete evicts the cached token
+            Token.objects.filter(user=user).delete()
+            return Response(
+                {'message': 'Password reset successful'},
+                status=status.HTTP_200_OK,
+            )
+        else:
+            return Response(
+                {'error': 'Invalid link'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+            # raise ValidationError('Invalid token')
 
 
 class SoftDeleteUserView(generics.DestroyAPIView):
     """Soft delete the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -389,26 +409,28 @@ class SoftDeleteUserView(generics.DestroyAPIView):
         return self.request.user
 
     def perform_destroy(self, instance):
-        """Set is active to false and return response"""
-        # Perform soft delete by setting is_active to False
+        """Set is active to false instead of deleting the user"""
+        # Perform soft delete by setting is_active to False. Only is_active
+        # and updated_at, which auto_now only sets when listed, are written;
+        # save() is kept so post_save clears cached tokens.
         instance.is_active = False
-        instance.save()
-        return Response(
-            {'detail': 'user deleted'},
-            status=status.HTTP_204_NO_CONTENT,
-        )
+        instance.save(update_fields=['is_active', 'updated_at'])
 
 
 class LogoutView(APIView):
     """Logout authenticated user."""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, format=None):
         """Remove auth token and return response"""
-        # delete the token to force a login
-        request.user.auth_token.delete()
+        # delete the token to force a login, token authentication has
+        # already loaded it as request.auth
+        token = request.auth
+        if not isinstance(token, Token):
+            token = request.user.auth_token
+        token.delete()
         response = Response(status=status.HTTP_204_NO_CONTENT)
         response.delete_cookie('auth_token')
         response.delete_cookie('csrftoken')
@@ -418,7 +440,7 @@ class LogoutView(APIView):
 class ValidateTokenView(APIView):
     """Validate the Auth token"""
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get(self, request):
         if request.user.is_authenticated:
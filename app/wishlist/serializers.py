@@ -5,10 +5,20 @@ Serializers for wishlist APIs
 from rest_framework import serializers
 
 from core.models import Wishlist, Product
+from wishlist.signals import clear_cached_lists
 from django.core.files.base import ContentFile
+from django.db import connection, models
 import base64
 
 
+class ProductListSerializer(serializers.ListSerializer):
+    """Serializer for a list of products."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return [self.child.to_plain_dict(product) for product in iterable]
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """Serializer for products."""
 
@@ -31,6 +41,24 @@ class ProductSerializer(serializers.ModelSerializer):
             "is_reserved",
         ]
         read_only_fields = ["id"]
+        list_serializer_class = ProductListSerializer
+
+    @staticmethod
+    def to_plain_dict(product):
+        """
+        Return the same representation as to_representation, built
+        directly from the model so lists skip the per-field machinery.
+        """
+        return {
+            'id': product.id,
+            'name': product.name,
+            'link': product.link,
+            'priority': product.priority,
+            'price': f'{product.price:.2f}',
+            'notes': product.notes,
+            'image': str(product.image),
+            'is_reserved': product.is_reserved,
+        }
 
     def validate_image(self, image):
         """Decode base64 image and convert it to file."""
@@ -82,25 +110,90 @@ class ProductImageSerializer(serializers.ModelSerializer):
         extra_kwargs = {'image': {'required': 'True'}}
 
 
+class WishlistCreateListSerializer(serializers.ListSerializer):
+    """Serializer for creating several wishlists at once."""
+
+    def create(self, validated_data):
+        products = [attrs.pop('products', []) for attrs in validated_data]
+        wishlists = [Wishlist(**attrs) for attrs in validated_data]
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Wishlist.objects.bulk_create(wishlists)
+            # bulk_create doesn't send post_save
+            clear_cached_lists(self.context['request'].user.id)
+        else:
+            # bulk_create can't set the new primary keys on this backend
+            for wishlist in wishlists:
+                wishlist.save()
+
+        for wishlist, wishlist_products in zip(wishlists, products):
+            self.child._get_or_create_products(wishlist_products, wishlist)
+
+        return wishlists
+
+
 class WishlistSerializer(serializers.ModelSerializer):
     """Serializer for wishlists."""
 
     products = ProductSerializer(many=True, required=False)
 
+    # columns read by the serializer, for read only list querysets
+    LIST_ONLY_FIELDS = ['id', 'title', 'occasion_date', 'user', 'uuid']
+
     class Meta:
         model = Wishlist
         fields = ["id", "title", "occasion_date", "products", "user", "uuid"]
         read_only_fields = ["id", "user", "uuid"]
+        list_serializer_class = WishlistCreateListSerializer
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load the related objects read by the serializer fields."""
+        return queryset.prefetch_related('products')
 
     def _get_or_create_products(self, products, wishlist):
         """Handle getting or creating products as needed."""
         auth_user = self.context['request'].user
-        for product in products:
-            product_obj, created = Product.objects.get_or_create(
+        if not products:
+            return
+
+        # like get_or_create, a product matches when every given field does
+        candidates = list(
+            Product.objects.filter(
                 user=auth_user,
-                **product,
+                name__in={product['name'] for product in products},
             )
-            wishlist.products.add(product_obj)
+        )
+        product_objs = []
+        missing = []
+        for product in products:
+            product_obj = next(
+                (
+                    candidate
+                    for candidate in candidates
+                    if all(
+                        getattr(candidate, field) == value
+                        for field, value in product.items()
+                    )
+                ),
+                None,
+            )
+            if product_obj is None:
+                product_obj = Product(user=auth_user, **product)
+                candidates.append(product_obj)
+                missing.append(product_obj)
+            product_objs.append(product_obj)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Product.objects.bulk_create(missing)
+        else:
+            # bulk_create can't set the new primary keys on this backend
+            for product_obj in missing:
+                product_obj.save()
+
+        wishlist.products.add(*product_objs)
+        # bulk_create and M2M changes don't send post_save
+        clear_cached_lists(auth_user.id)
 
     # customize method so that we can override the
     # frameworks create/write method to create products via wishlist
@@ -116,20 +209,33 @@ class WishlistSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update wishlist."""
         products = validated_data.pop('products', None)
-        if products is not None:
-            if len(products) == 0:
-                instance.products.clear()
-                self._get_or_create_products(products, instance)
-            else:
-                self._get_or_create_products(products, instance)
+        if products:
+            self._get_or_create_products(products, instance)
+        elif products is not None:
+            # the instance.save() below clears the cached lists
+            instance.products.clear()
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        # auto_now only applies to fields listed in update_fields
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         return instance
 
 
+class WishlistListSerializer(WishlistSerializer):
+    """Read only serializer for listing wishlists."""
+
+    products = ProductSerializer(many=True, read_only=True)
+
+    class Meta(WishlistSerializer.Meta):
+        read_only_fields = WishlistSerializer.Meta.fields
+
+    def to_representation(self, instance):
+        """Return a plain dict, which pickles faster for cached lists."""
+        return dict(super().to_representation(instance))
+
+
 class WishlistDetailSerializer(WishlistSerializer):
     """Serializer for wishlist detail view."""
 
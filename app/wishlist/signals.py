@@ -0,0 +1,35 @@
+"""
+Signal handlers for wishlist APIs
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Product, Wishlist
+
+
+def wishlist_list_cache_key(user_id):
+    """Return the cache key for a users serialized wishlist list."""
+    return f'wishlists:{user_id}'
+
+
+def product_list_cache_key(user_id):
+    """Return the cache key for a users serialized product list."""
+    return f'products:{user_id}'
+
+
+def clear_cached_lists(user_id):
+    """Drop the cached wishlist and product lists of a user."""
+    cache.delete_many(
+        [wishlist_list_cache_key(user_id), product_list_cache_key(user_id)]
+    )
+
+
+@receiver(post_save, sender=Wishlist)
+@receiver(post_delete, sender=Wishlist)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def clear_cached_user_lists(sender, instance, **kwargs):
+    """Drop the owners cached lists when a wishlist or product changes."""
+    clear_cached_lists(instance.user_id)
@@ -10,8 +10,9 @@ from PIL import Image
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -87,11 +88,33 @@ class PublicProductsApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_reserve_and_unreserve_product(self):
+        """Test a guest can reserve and unreserve a product."""
+        product = create_product(user=create_user())
+
+        with self.assertNumQueries(2):
+            res = self.client.patch(
+                reverse('wishlist:product-reserve', args=[product.id])
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertTrue(product.is_reserved)
+
+        res = self.client.patch(
+            reverse('wishlist:product-unreserve', args=[product.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertFalse(product.is_reserved)
+
 
 class PrivateProductsApiTests(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        cache.clear()
         self.user = create_user()
         self.client = APIClient()
         self.client.force_authenticate(self.user)
@@ -108,6 +131,31 @@ class PrivateProductsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    @override_settings(SHARED_CACHE_ENABLED=False)
+    def test_product_list_not_cached_without_shared_cache(self):
+        """Test the product list isn't cached in a per process cache."""
+        self.client.get(PRODUCTS_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_product_list_matches_product_detail(self):
+        """Test list representation of products matches the single one."""
+        create_product(user=self.user)
+        create_product(
+            user=self.user, link=None, image="uploads/product/a.jpg"
+        )
+
+        products = Product.objects.all()
+        serializer = ProductSerializer(products, many=True)
+
+        self.assertEqual(
+            serializer.data,
+            [ProductSerializer(product).data for product in products],
+        )
+
     def test_products_limited_to_user(self):
         """Test list of products is limited to authenticated user."""
         user2 = create_user(email='user2@example.com')
@@ -5,7 +5,8 @@ Tests for wishlist APIs.
 import datetime
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
@@ -63,6 +64,7 @@ class PrivateWishlistApiTests(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = create_user(email="user@example.com", password="test123")
         self.client.force_authenticate(self.user)
@@ -79,6 +81,60 @@ class PrivateWishlistApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_wishlist_query_count(self):
+        """Test listing wishlists loads products in one query."""
+        for _ in range(3):
+            wishlist = create_wishlist(user=self.user)
+            wishlist.products.add(
+                Product.objects.create(
+                    user=self.user, name="Pink Top", price="10.99"
+                )
+            )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(WISHLIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+    @override_settings(SHARED_CACHE_ENABLED=True)
+    def test_wishlist_list_cached_until_products_change(self):
+        """Test the wishlist list is cached and refreshed on changes."""
+        wishlist = create_wishlist(user=self.user)
+        self.client.get(WISHLIST_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(WISHLIST_URL)
+        self.assertEqual(res.data[0]["products"], [])
+
+        payload = {"products": [{"name": "Pink Top", "price": "10.99"}]}
+        self.client.patch(
+            wishlist_detail_url(wishlist.uuid), payload, format="json"
+        )
+        res = self.client.get(WISHLIST_URL)
+
+        self.assertEqual(res.data[0]["products"][0]["name"], "Pink Top")
+
+    @override_settings(SHARED_CACHE_ENABLED=False)
+    def test_wishlist_list_not_cached_without_shared_cache(self):
+        """Test the wishlist list isn't cached in a per process cache."""
+        create_wishlist(user=self.user)
+        self.client.get(WISHLIST_URL)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(WISHLIST_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_wishlist_list_not_modified(self):
+        """Test an unchanged wishlist list returns 304 for its ETag."""
+        create_wishlist(user=self.user)
+        res = self.client.get(WISHLIST_URL)
+
+        res = self.client.get(WISHLIST_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_wishlist_list_limited_to_user(self):
         """Test list of wishlist is limited to authenticated user."""
         other_user = create_user(email="other@example.com", password="test123")
@@ -220,6 +276,27 @@ class PrivateWishlistApiTests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_create_wishlist_reuses_existing_products(self):
+        """Test creating a wishlist links matching existing products."""
+        product = Product.objects.create(
+            user=self.user, name="Pink Top", price="10.99"
+        )
+        payload = {
+            "title": "Sample wishlist",
+            "products": [
+                {"name": "Pink Top", "price": "10.99"},
+                {"name": "Pink Top", "price": "10.99"},
+            ],
+        }
+
+        with self.assertNumQueries(4):
+            res = self.client.post(WISHLIST_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.objects.filter(user=self.user).count(), 1)
+        wishlist = Wishlist.objects.get(id=res.data["id"])
+        self.assertEqual(list(wishlist.products.all()), [product])
+
     def test_create_wishlist(self):
         """Test creating a wishlist."""
         payload = {
@@ -338,3 +415,120 @@ class PrivateWishlistApiTests(TestCase):
         self.assertIn(s1.data, res.data)
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
+
+    def test_filter_by_products_unique(self):
+        """Test filtering by products returns each wishlist once."""
+        wishlist = create_wishlist(user=self.user, title='Birthday')
+        prod1 = Product.objects.create(
+            user=self.user, name='PS5', price=399.00
+        )
+        prod2 = Product.objects.create(
+            user=self.user, name='trainers', price=120.00
+        )
+        wishlist.products.add(prod1, prod2)
+
+        params = {'products': f'{prod1.id},{prod2.id}'}
+        res = self.client.get(WISHLIST_URL, params)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_filter_by_invalid_products_error(self):
+        """Test filtering by a non numeric product ID returns an error."""
+        res = self.client.get(WISHLIST_URL, {'products': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_share_wishlists(self):
+        """Test sharing wishlists makes them public and returns a link."""
+        wishlists = [create_wishlist(user=self.user) for _ in range(2)]
+
+        with self.assertNumQueries(2):
+            res = self.client.post(
+                reverse("wishlist:wishlist-generate-share-link"),
+                [wishlist.id for wishlist in wishlists],
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(str(self.user.uuid), res.data["shareLink"])
+        for wishlist in wishlists:
+            wishlist.refresh_from_db()
+            self.assertTrue(wishlist.is_public)
+
+    def test_share_other_users_wishlist_error(self):
+        """Test sharing another users wishlist is forbidden."""
+        other_user = create_user(email="other@example.com", password="test123")
+        own = create_wishlist(user=self.user)
+        other = create_wishlist(user=other_user)
+
+        res = self.client.post(
+            reverse("wishlist:wishlist-generate-share-link"),
+            [own.id, other.id],
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        own.refresh_from_db()
+        self.assertFalse(own.is_public)
+
+    def test_view_shared_wishlists(self):
+        """Test viewing shared wishlists loads them in two queries."""
+        wishlists = [
+            create_wishlist(user=self.user, is_public=True) for _ in range(2)
+        ]
+        url = reverse(
+            "wishlist:wishlist-view-shared-wishlist",
+            args=[self.user.uuid, f"{wishlists[0].id}-{wishlists[1].id}"],
+        )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertIn("public", res["Cache-Control"])
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    def test_view_shared_wishlists_not_public_error(self):
+        """Test viewing a wishlist that is not shared returns an error."""
+        wishlist = create_wishlist(user=self.user)
+        url = reverse(
+            "wishlist:wishlist-view-shared-wishlist",
+            args=[self.user.uuid, str(wishlist.id)],
+        )
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_merge_wishlists(self):
+        """Test merging saves every local wishlist with its products."""
+        payload = {
+            "wishList": [
+                {
+                    "title": "Birthday",
+                    "products": [
+                        {"name": "Book", "price": "9.99"},
+                        {"name": "Pen", "price": "1.50"},
+                    ],
+                },
+                {
+                    "title": "Christmas",
+                    "products": [{"name": "Book", "price": "9.99"}],
+                },
+            ]
+        }
+
+        res = self.client.post(
+            reverse("wishlist:merge-wishlist-list"), payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        wishlists = Wishlist.objects.filter(user=self.user)
+        self.assertEqual(wishlists.count(), 2)
+        self.assertEqual(Product.objects.filter(user=self.user).count(), 2)
+        christmas = wishlists.get(title="Christmas")
+        self.assertEqual(
+            [product.name for product in christmas.products.all()], ["Book"]
+        )
@@ -10,15 +10,24 @@ from drf_spectacular.utils import (
 )
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from user.permissions import IsOwnerOrReadOnly, PublicReservePermission
-from django.shortcuts import get_list_or_404
+from core.authentication import CachedTokenAuthentication
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from core.models import Wishlist, Product
 from wishlist import serializers
+from wishlist.signals import product_list_cache_key, wishlist_list_cache_key
+
+# seconds an unfiltered wishlist or product list is served from the cache
+LIST_CACHE_TIMEOUT = 60
 
 
 @extend_schema_view(
@@ -36,36 +45,64 @@ class WishlistViewSet(viewsets.ModelViewSet):
     """View for manage wishlist APIs."""
 
     serializer_class = serializers.WishlistDetailSerializer
+    action_serializer_classes = {
+        'list': serializers.WishlistListSerializer,
+        'view_shared_wishlist': serializers.WishlistListSerializer,
+    }
     queryset = Wishlist.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     lookup_field = 'uuid'  # Use UUID as the lookup field
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
-
-        # TO-Do raise error if user imputs something other than string
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {'products': 'Must be a comma separated list of IDs.'}
+            )
 
     def get_queryset(self):
-        """Retrieve wishlists for authenticated user."""
+        """Retrieve wishlists with their products for authenticated user."""
         products = self.request.query_params.get('products')
         queryset = self.queryset
         if products:
             product_ids = self._params_to_ints(products)
-            queryset = queryset.filter(products__id__in=product_ids)
+            # EXISTS instead of joining products, so no duplicate rows
+            # need removing with distinct()
+            queryset = queryset.filter(
+                Exists(
+                    Wishlist.products.through.objects.filter(
+                        wishlist_id=OuterRef('pk'), product_id__in=product_ids
+                    )
+                )
+            )
 
-        return (
-            queryset.filter(user=self.request.user).order_by('-id').distinct()
+        serializer_class = self.get_serializer_class()
+        queryset = serializer_class.setup_eager_loading(queryset)
+        if self.action == 'list':
+            queryset = queryset.only(*serializer_class.LIST_ONLY_FIELDS)
+        return queryset.filter(user=self.request.user).order_by('-id')
+
+    def list(self, request, *args, **kwargs):
+        """Return the wishlists, unfiltered lists are cached for a short time."""
+        # only a shared cache is cleared for every worker on changes
+        if request.query_params or not settings.SHARED_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        data = cache.get_or_set(
+            wishlist_list_cache_key(request.user.id),
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+            LIST_CACHE_TIMEOUT,
         )
+        return Response(data)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
-            return serializers.WishlistSerializer
-        elif self.action == 'view_shared_wishlist':
-            return serializers.WishlistSerializer
-        return self.serializer_class
+        return self.action_serializer_classes.get(
+            self.action, self.serializer_class
+        )
 
     def perform_create(self, serializer):
         """Create a new wishlist."""
@@ -84,33 +121,32 @@ class WishlistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        wishlists = get_list_or_404(Wishlist, id__in=wishlist_ids, user=user)
-
-        incorrect_user = [
-            element for element in wishlists if element.user != user
-        ]
-
-        if incorrect_user:
-            return Response(
-                {"error": "Only the owner can share the wishlist"},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+        # one query answers both the ownership check and the 404
+        owners = Wishlist.objects.filter(id__in=wishlist_ids).values_list(
+            'id', 'user_id'
+        )
+        owned_ids = []
+        for wishlist_id, owner_id in owners:
+            if owner_id != user.id:
+                return Response(
+                    {"error": "Only the owner can share the wishlist"},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            owned_ids.append(wishlist_id)
 
-        # for wishlist in wishlists:
-        #     if wishlist.user == user:
-        #         return Response(
-        #             {"error": "Only the owner can share the wishlist"},
-        #             status=status.HTTP_403_FORBIDDEN,
-        #         )
+        if not owned_ids:
+            raise Http404
 
-        for wishlist in wishlists:
-            wishlist.is_public = True
-            wishlist.save()
+        # is_public isn't part of any cached list, so skipping post_save
+        # with a single UPDATE leaves nothing stale
+        Wishlist.objects.filter(id__in=owned_ids).update(
+            is_public=True, updated_at=timezone.now()
+        )
 
         # Generate the UUID-based link that includes multiple wishlists
         scheme = request.scheme
         client_site = settings.CLIENT_HOST
-        wishlist_ids_str = '-'.join([str(w.id) for w in wishlists])
+        wishlist_ids_str = '-'.join(str(wishlist_id) for wishlist_id in owned_ids)
         share_link = f"{scheme}://{client_site}/wishlists/view/{user.uuid}/{wishlist_ids_str}"
 
         return Response({'shareLink': share_link})
@@ -126,23 +162,24 @@ class WishlistViewSet(viewsets.ModelViewSet):
         # Split wishlist_ids by commas
         wishlist_ids_list = wishlist_ids.split('-')
 
-        # Filter the wishlists by ids and user uuid
-        wishlists = Wishlist.objects.filter(
-            id__in=wishlist_ids_list, user__uuid=user_uuid
+        # Filter the wishlists by ids and user uuid, evaluated once so
+        # the checks below and the serializer share the same rows
+        wishlists = list(
+            serializers.WishlistListSerializer.setup_eager_loading(
+                Wishlist.objects.filter(
+                    id__in=wishlist_ids_list, user__uuid=user_uuid
+                )
+            )
         )
 
-        if not wishlists.exists():
+        if not wishlists:
             return Response(
                 {'error': 'No wishlists found'},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
         # Check if any wishlists are not public
-        non_public_wishlists = [
-            wishlist for wishlist in wishlists if not wishlist.is_public
-        ]
-
-        if non_public_wishlists:
+        if not all(wishlist.is_public for wishlist in wishlists):
             return Response(
                 {
                     'error': 'Invalid wishlist request, contains non-public wishlists'
@@ -151,8 +188,13 @@ class WishlistViewSet(viewsets.ModelViewSet):
             )
 
         # Serialize the wishlists to return the data
-        serializer = serializers.WishlistSerializer(wishlists, many=True)
-        return Response(serializer.data)
+        serializer = serializers.WishlistListSerializer(wishlists, many=True)
+        response = Response(serializer.data)
+        # shared caches may store the public data but must revalidate it
+        # against the ETag as reservations and sharing can change at any time
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
 
 
 @extend_schema_view(
@@ -177,7 +219,7 @@ class ProductViewSet(
 
     serializer_class = serializers.ProductSerializer
     queryset = Product.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -187,13 +229,19 @@ class ProductViewSet(
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(wishlist__isnull=False)
+            queryset = queryset.filter(
+                Exists(
+                    Wishlist.products.through.objects.filter(
+                        product_id=OuterRef('pk')
+                    )
+                )
+            )
 
         # Filter by user only if the user is authenticated
         if self.request.user.is_authenticated:
             queryset = queryset.filter(user=self.request.user)
 
-        return queryset.order_by('-name').distinct()
+        return queryset.order_by('-name')
 
         # return (
         #     queryset.filter(user=self.request.user)
@@ -201,6 +249,18 @@ class ProductViewSet(
         #     .distinct()
         # )
 
+    def list(self, request, *args, **kwargs):
+        """Return the products, unfiltered lists are cached for a short time."""
+        if request.query_params or not settings.SHARED_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        data = cache.get_or_set(
+            product_list_cache_key(request.user.id),
+            lambda: self.get_serializer(self.get_queryset(), many=True).data,
+            LIST_CACHE_TIMEOUT,
+        )
+        return Response(data)
+
     def get_serializer_class(self):
         """upload image for authenticated user."""
         if self.action == 'upload_image':
@@ -231,9 +291,9 @@ class ProductViewSet(
         """
         try:
             product = self.get_object()
-            owner = product.user
 
-            if request.user == owner:
+            # compare ids so the owner row isn't loaded
+            if request.user.id == product.user_id:
                 return Response(
                     {
                         "error": "Owners cannot reserve their own wishlist items"
@@ -249,7 +309,7 @@ class ProductViewSet(
             #     product.reserved_by_guest =
             # request.data.get('guest_name', 'Guest')
 
-            product.save()
+            product.save(update_fields=['is_reserved', 'updated_at'])
             return Response(
                 {"message": "Product reserved successfully"},
                 status=status.HTTP_200_OK,
@@ -271,9 +331,9 @@ class ProductViewSet(
         """
         try:
             product = self.get_object()
-            owner = product.user
 
-            if request.user == owner:
+            # compare ids so the owner row isn't loaded
+            if request.user.id == product.user_id:
                 return Response(
                     {
                         "error": "Owners cannot reserve their own wishlist items"
@@ -283,7 +343,7 @@ class ProductViewSet(
 
             product.is_reserved = False
 
-            product.save()
+            product.save(update_fields=['is_reserved', 'updated_at'])
             return Response(
                 {"message": "Product unreserved, successfully"},
                 status=status.HTTP_200_OK,
@@ -302,7 +362,7 @@ class MergeWishlistView(
     """manages merging wishlists made by unauthenticated users"""
 
     serializer_class = serializers.WishlistDetailSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
@@ -318,40 +378,9 @@ class MergeWishlistView(
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        for wishlist_data in local_wishlists:
-            # Create or update the wishlist,
-            # products are handled by WishlistSerializer
-            wishlist_serializer = self.get_serializer(data=wishlist_data)
-            wishlist_serializer.is_valid(raise_exception=True)
-            wishlist_serializer.save(user=request.user)
-
-            # for wishlist_data in local_wishlists:
-            #     # Extract products data
-            #     products_data = wishlist_data.pop('products', [])
-
-            #     # Create or update the wishlist
-            #     wishlist_serializer = self.get_serializer(data=wishlist_data)
-            #     wishlist_serializer.is_valid(raise_exception=True)
-            #     wishlist = wishlist_serializer.save(user=request.user)
-
-            #     # Handle products creation
-            #     for product_data in products_data:
-            #         product_data['user'] = (
-            #             request.user.id
-            #         )
-            # Ensure the product is linked to the authenticated user
-            #         product_serializer = serializers.ProductSerializer(
-            #             data=product_data, context={'request': request}
-            #         )
-            #         if product_serializer.is_valid():
-            #             product = product_serializer.save()
-            #             wishlist.products.add(product)
-            #         else:
-            #             return Response(
-            #                 product_serializer.errors,
-            #                 status=status.HTTP_400_BAD_REQUEST,
-            #             )
+        # products are handled by WishlistSerializer
+        serializer = self.get_serializer(data=local_wishlists, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
 
-            return Response(
-                wishlist_serializer.data, status=status.HTTP_201_CREATED
-            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)